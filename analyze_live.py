@@ -1,9 +1,14 @@
-﻿import csv, json, os, time, datetime
+﻿import heapq, os, sys, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
 from pathlib import Path
 
 import yaml
 from dotenv import load_dotenv
 
+from common import csv_field, make_logger, read_json, write_json
+from keyword_match import build_matcher
+
 # PRAW only needed when OFFLINE_MODE=0
 try:
     import praw
@@ -16,50 +21,46 @@ OUT  = ROOT / "output"
 LOGD = ROOT / "logs"
 MOCK = ROOT / "data" / "mock_posts.json"
 
+# Each fetch worker has its own client and rate limiter, but they all draw on
+# the same Reddit quota, so keep the combined request rate bounded
+MAX_FETCH_WORKERS = 4
+
 OUT.mkdir(exist_ok=True)
 LOGD.mkdir(exist_ok=True)
 
-def log(msg: str):
-    ts = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    line = f"[{ts}] {msg}"
-    print(line)
-    with open(LOGD / "run_live.log", "a", encoding="utf-8") as f:
-        f.write(line + "\n")
+log = make_logger("analyze_live", LOGD / "run_live.log")
 
 def load_config():
     with open(CFG, "r", encoding="utf-8") as f:
         return yaml.safe_load(f) or {}
 
-def keyword_hits(text: str, keywords):
-    t = (text or "").lower()
-    return [k for k in keywords if (k or "").lower() in t]
-
 def load_mock_posts():
-    # BOM-safe on Windows
-    with open(MOCK, "r", encoding="utf-8-sig") as f:
-        posts = json.load(f)
+    posts = read_json(MOCK)
 
+    # Normalize in place rather than copying every post into a new dict
     now = int(time.time())
     cleaned = []
     for i, p in enumerate(posts):
         if not isinstance(p, dict):
             continue
 
-        created = int(p.get("created_utc") or (now - i * 6 * 3600))
-        cleaned.append({
-            "subreddit": p.get("subreddit", ""),
-            "id": p.get("id", ""),
-            "title": p.get("title", ""),
-            "selftext": p.get("selftext", "") or "",
-            "created_utc": created,
-            "score": int(p.get("score") or 0),
-            "num_comments": int(p.get("num_comments") or 0),
-            "permalink": p.get("permalink") or p.get("link") or "",
-            "url": p.get("url", "") or "",
-        })
+        p["created_utc"] = int(p.get("created_utc") or (now - i * 6 * 3600))
+        # Subreddit names repeat across every post; keep one shared string per name
+        sub = p.setdefault("subreddit", "")
+        if isinstance(sub, str):
+            p["subreddit"] = sys.intern(sub)
+        p.setdefault("id", "")
+        p.setdefault("title", "")
+        p["selftext"] = p.get("selftext") or ""
+        p["score"] = int(p.get("score") or 0)
+        p["num_comments"] = int(p.get("num_comments") or 0)
+        p["permalink"] = p.get("permalink") or p.get("link") or ""
+        p["url"] = p.get("url") or ""
+        cleaned.append(p)
     return cleaned
 
-def make_reddit():
+def reddit_settings():
+    """praw.Reddit keyword arguments from .env, or None in OFFLINE_MODE."""
     load_dotenv(ROOT / ".env")
     offline = os.getenv("OFFLINE_MODE", "0").strip().lower() in ("1","true","yes")
 
@@ -77,62 +78,89 @@ def make_reddit():
     if not client_id or not client_secret or not user_agent:
         raise RuntimeError("Missing creds in .env. Set REDDIT_CLIENT_ID / REDDIT_CLIENT_SECRET / REDDIT_USER_AGENT (or set OFFLINE_MODE=1).")
 
+    settings = {
+        "client_id": client_id,
+        "client_secret": client_secret,
+        "user_agent": user_agent,
+    }
+
     # Optional auth (not required for read-only public listings)
     username = os.getenv("REDDIT_USERNAME", "").strip()
     password = os.getenv("REDDIT_PASSWORD", "").strip()
-
     if username and password:
-        reddit = praw.Reddit(
-            client_id=client_id,
-            client_secret=client_secret,
-            user_agent=user_agent,
-            username=username,
-            password=password,
-        )
-        mode = "auth"
-    else:
-        reddit = praw.Reddit(
-            client_id=client_id,
-            client_secret=client_secret,
-            user_agent=user_agent,
-        )
-        mode = "app-only"
+        settings["username"] = username
+        settings["password"] = password
+
+    return settings
+
+def new_reddit(settings):
+    # PRAW is not thread-safe (its rate limiter and token refresh are unlocked),
+    # so every thread that talks to Reddit needs its own client
+    return praw.Reddit(**settings)
+
+def make_reddit():
+    settings = reddit_settings()
+    if settings is None:
+        return None
 
+    reddit = new_reddit(settings)
+    mode = "auth" if "username" in settings else "app-only"
     log(f"Reddit client initialized ({mode}, read-only usage).")
     return reddit
 
-def fetch_posts(reddit, subreddits, hours=72, per_sub_limit=250, polite_pause_s=1.0):
-    all_posts = []
+def _fetch_one(reddit, sub, cutoff, per_sub_limit):
+    log(f"Fetching r/{sub} (new) limit={per_sub_limit}")
+    sr = reddit.subreddit(sub)
+
+    posts = []
+    scanned = 0
+
+    for post in sr.new(limit=per_sub_limit):
+        scanned += 1
+        created = int(getattr(post, "created_utc", 0))
+        if created < cutoff:
+            break
+
+        posts.append({
+            "subreddit": sub,
+            "id": post.id,
+            "title": post.title,
+            "selftext": getattr(post, "selftext", "") or "",
+            "created_utc": created,
+            "score": int(getattr(post, "score", 0) or 0),
+            "num_comments": int(getattr(post, "num_comments", 0) or 0),
+            "permalink": "https://reddit.com" + getattr(post, "permalink", ""),
+            "url": getattr(post, "url", "") or "",
+        })
+
+    log(f"r/{sub}: scanned={scanned}, kept_in_window={len(posts)}")
+    return posts
+
+def fetch_posts(settings, subreddits, hours=72, per_sub_limit=250, max_workers=4, polite_pause_s=1.0):
+    # Listings are network-bound, so fetch a few subreddits at once. Each worker
+    # thread builds its own client (own rate limiter and token) and pauses
+    # between the subreddits it fetches, as the serial loop did
     cutoff = int(time.time()) - hours * 3600
+    workers = max(1, min(max_workers, MAX_FETCH_WORKERS, len(subreddits)))
+    if workers != max_workers:
+        log(f"fetch_workers={max_workers} -> using {workers} (cap {MAX_FETCH_WORKERS}, {len(subreddits)} subreddits)")
+    mode = "auth" if "username" in settings else "app-only"
+    log(f"Fetching {len(subreddits)} subreddits window={hours}h workers={workers} ({mode}, read-only usage)")
+
+    local = threading.local()
+
+    def fetch(sub):
+        reddit = getattr(local, "reddit", None)
+        if reddit is None:
+            reddit = local.reddit = new_reddit(settings)
+        else:
+            time.sleep(polite_pause_s)
+        return _fetch_one(reddit, sub, cutoff, per_sub_limit)
 
-    for sub in subreddits:
-        log(f"Fetching r/{sub} (new) limit={per_sub_limit} window={hours}h")
-        sr = reddit.subreddit(sub)
-
-        scanned = 0
-        kept = 0
-
-        for post in sr.new(limit=per_sub_limit):
-            scanned += 1
-            created = int(getattr(post, "created_utc", 0))
-            if created < cutoff:
-                break
-
-            all_posts.append({
-                "subreddit": sub,
-                "id": post.id,
-                "title": post.title,
-                "selftext": getattr(post, "selftext", "") or "",
-                "created_utc": created,
-                "score": int(getattr(post, "score", 0) or 0),
-                "num_comments": int(getattr(post, "num_comments", 0) or 0),
-                "permalink": "https://reddit.com" + getattr(post, "permalink", ""),
-                "url": getattr(post, "url", "") or "",
-            })
-            kept += 1
-
-        log(f"r/{sub}: scanned={scanned}, kept_in_window={kept}")
-        time.sleep(polite_pause_s)
+    all_posts = []
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        for posts in ex.map(fetch, subreddits):
+            all_posts.extend(posts)
 
     return all_posts
 
@@ -143,67 +171,78 @@ def main():
 
     hours = int(cfg.get("window_hours") or 72)
     per_sub_limit = int(cfg.get("per_sub_limit") or 250)
+    fetch_workers = int(cfg.get("fetch_workers") or 4)
     polite_pause_s = float(cfg.get("polite_pause_s") or 1.0)
+    sort_output = cfg.get("sort_output", True)
+    cutoff = int(time.time()) - hours * 3600
+    sub_set = frozenset(subreddits)
 
     log(f"Loaded config: {len(subreddits)} subreddits, {len(keywords)} keywords, window={hours}h")
 
-    reddit = make_reddit()
+    settings = reddit_settings()
 
-    if reddit is None:
+    if settings is None:
         posts = load_mock_posts()
-        cutoff = int(time.time()) - hours * 3600
         posts = [p for p in posts
-                 if (not subreddits or p.get("subreddit") in subreddits)
+                 if (not sub_set or p.get("subreddit") in sub_set)
                  and int(p.get("created_utc", 0)) >= cutoff]
         log(f"Loaded mock posts kept: {len(posts)}")
     else:
-        posts = fetch_posts(reddit, subreddits, hours=hours, per_sub_limit=per_sub_limit, polite_pause_s=polite_pause_s)
+        posts = fetch_posts(settings, subreddits, hours=hours, per_sub_limit=per_sub_limit,
+                            max_workers=fetch_workers, polite_pause_s=polite_pause_s)
         log(f"Total posts kept: {len(posts)}")
 
-    enriched = []
+    keyword_hits = build_matcher(keywords)
     for p in posts:
-        combined = f'{p.get("title","")} {p.get("selftext","")}'
-        hits = keyword_hits(combined, keywords)
-        e = dict(p)
-        e["keyword_hits"] = hits
-        e["keyword_hit_count"] = len(hits)
-        enriched.append(e)
+        blob = ((p.get("title") or "") + " " + (p.get("selftext") or "")).lower()
+        hits = keyword_hits(blob)
+        p["keyword_hits"] = hits
+        p["keyword_hit_count"] = len(hits)
+    enriched = posts
 
     # Sort demand signals
-    enriched.sort(key=lambda x: (x.get("keyword_hit_count", 0), x.get("score", 0), x.get("num_comments", 0)), reverse=True)
+    # Every post carries all three keys by now, so a C-level itemgetter is enough
+    rank_key = itemgetter("keyword_hit_count", "score", "num_comments")
+    if sort_output:
+        enriched.sort(key=rank_key, reverse=True)
+        top = enriched[:15]
+    else:
+        # Only the summary needs ranking: O(N log k) instead of a full sort
+        top = heapq.nlargest(15, enriched, key=rank_key)
 
-    stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    stamp = time.strftime("%Y%m%d_%H%M%S")
     out_json = OUT / f"live_posts_{stamp}.json"
     out_csv  = OUT / f"live_posts_{stamp}.csv"
     out_summary = OUT / f"live_summary_{stamp}.txt"
 
-    with open(out_json, "w", encoding="utf-8") as f:
-        json.dump(enriched, f, ensure_ascii=False, indent=2)
+    write_json(out_json, enriched)
 
     fieldnames = ["subreddit","id","created_utc","score","num_comments","title","permalink","url","keyword_hit_count","keyword_hits"]
-    with open(out_csv, "w", encoding="utf-8", newline="") as f:
-        w = csv.DictWriter(f, fieldnames=fieldnames)
-        w.writeheader()
-        for p in enriched:
-            row = {k: p.get(k, "") for k in fieldnames}
-            row["keyword_hits"] = ";".join(p.get("keyword_hits") or [])
-            w.writerow(row)
-
-    top = enriched[:15]
+    with open(out_csv, "w", encoding="utf-8", newline="", buffering=1 << 20) as f:
+        # Fixed schema, so format rows directly instead of going through the csv module
+        f.write(",".join(fieldnames) + "\r\n")
+        f.write("".join(
+            f'{csv_field(p.get("subreddit"))},{csv_field(p.get("id"))},{csv_field(p.get("created_utc"))},'
+            f'{csv_field(p.get("score"))},{csv_field(p.get("num_comments"))},{csv_field(p.get("title"))},'
+            f'{csv_field(p.get("permalink"))},{csv_field(p.get("url"))},{p["keyword_hit_count"]},'
+            f'{csv_field(";".join(p["keyword_hits"]))}\r\n'
+            for p in enriched
+        ))
+
     lines = []
     lines.append(f"Window: last {hours} hours")
     lines.append(f"Total posts kept: {len(enriched)}")
     lines.append("")
     lines.append("Top demand signals (sorted by keyword hits, score, comments):")
     for p in top:
-        dt = datetime.datetime.fromtimestamp(int(p["created_utc"]))
-        lines.append(f'- [{p.get("subreddit")}] ({p.get("keyword_hit_count")} hits) score={p.get("score")} comments={p.get("num_comments")} {dt:%Y-%m-%d %H:%M}: {p.get("title")}')
+        dt = time.strftime("%Y-%m-%d %H:%M", time.localtime(int(p["created_utc"])))
+        lines.append(f'- [{p.get("subreddit")}] ({p.get("keyword_hit_count")} hits) score={p.get("score")} comments={p.get("num_comments")} {dt}: {p.get("title")}')
         if p.get("keyword_hits"):
             lines.append(f'  hits: {", ".join(p["keyword_hits"])}')
         if p.get("permalink"):
             lines.append(f'  link: {p["permalink"]}')
 
-    with open(out_summary, "w", encoding="utf-8") as f:
+    with open(out_summary, "w", encoding="utf-8", buffering=1 << 20) as f:
         f.write("\n".join(lines) + "\n")
 
     log(f"Wrote: {out_json.name}, {out_csv.name}, {out_summary.name}")
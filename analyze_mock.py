@@ -1,4 +1,5 @@
-﻿import json, csv, os, sys, time, datetime
+﻿import heapq, sys, time
+from operator import itemgetter
 from pathlib import Path
 
 try:
@@ -7,6 +8,9 @@ except ImportError:
     print("PyYAML not installed. Run: python -m pip install -r requirements.txt", file=sys.stderr)
     sys.exit(1)
 
+from common import csv_field, make_logger, read_json, write_json
+from keyword_match import build_matcher
+
 ROOT = Path(__file__).resolve().parent
 DATA = ROOT / "data" / "mock_posts.json"
 CFG  = ROOT / "config.yaml"
@@ -16,92 +20,86 @@ LOGD = ROOT / "logs"
 OUT.mkdir(exist_ok=True)
 LOGD.mkdir(exist_ok=True)
 
-def log(msg: str):
-    ts = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    line = f"[{ts}] {msg}"
-    print(line)
-    with open(LOGD / "run.log", "a", encoding="utf-8-sig") as f:
-        f.write(line + "\n")
+log = make_logger("analyze_mock", LOGD / "run.log", encoding="utf-8-sig")
 
 def load_config():
     with open(CFG, "r", encoding="utf-8-sig") as f:
         return yaml.safe_load(f)
 
 def load_posts():
-    with open(DATA, "r", encoding="utf-8-sig") as f:
-        posts = json.load(f)
+    posts = read_json(DATA)
     # If created_utc is 0/missing, assign a recent timestamp (within last 48h) for demo purposes
     now = int(time.time())
     for i, p in enumerate(posts):
         if not p.get("created_utc"):
             # spread timestamps across last 48 hours
             p["created_utc"] = now - (i * 6 * 3600)
+        # Subreddit names repeat across every post; keep one shared string per name
+        sub = p.get("subreddit")
+        if isinstance(sub, str):
+            p["subreddit"] = sys.intern(sub)
+        p["score"] = int(p.get("score") or 0)
+        p["num_comments"] = int(p.get("num_comments") or 0)
     return posts
 
-def within_hours(created_utc: int, hours: int) -> bool:
-    return created_utc >= int(time.time()) - hours * 3600
-
-def keyword_hits(text: str, keywords):
-    t = (text or "").lower()
-    hits = []
-    for k in keywords:
-        if (k or "").lower() in t:
-            hits.append(k)
-    return hits
-
 def main():
     cfg = load_config()
-    subreddits = set((cfg.get("subreddits") or []))
+    subreddits = frozenset(cfg.get("subreddits") or [])
     keywords = (cfg.get("keywords") or [])
+    sort_output = cfg.get("sort_output", True)
 
     hours = 72  # Phase 1 target window
+    cutoff = int(time.time()) - hours * 3600
     log(f"Loaded config: {len(subreddits)} subreddits, {len(keywords)} keywords, window={hours}h")
     posts = load_posts()
     log(f"Loaded mock posts: {len(posts)}")
 
     # Filter by subreddit + time window
-    filtered = []
-    for p in posts:
-        if subreddits and p.get("subreddit") not in subreddits:
-            continue
-        if not within_hours(int(p.get("created_utc", 0)), hours):
-            continue
-        filtered.append(p)
+    filtered = [p for p in posts
+                if (not subreddits or p.get("subreddit") in subreddits)
+                and int(p.get("created_utc", 0)) >= cutoff]
 
     # Tag with keyword hits
-    enriched = []
+    keyword_hits = build_matcher(keywords)
     for p in filtered:
-        combined = f'{p.get("title","")} {p.get("selftext","")}'
-        hits = keyword_hits(combined, keywords)
-        e = dict(p)
-        e["keyword_hits"] = hits
-        e["keyword_hit_count"] = len(hits)
-        enriched.append(e)
+        blob = ((p.get("title") or "") + " " + (p.get("selftext") or "")).lower()
+        hits = keyword_hits(blob)
+        p["keyword_hits"] = hits
+        p["keyword_hit_count"] = len(hits)
+    enriched = filtered
 
     # Simple “demand signal”: sort by hit_count then score then comments
-    enriched.sort(key=lambda x: (x.get("keyword_hit_count", 0), x.get("score", 0), x.get("num_comments", 0)), reverse=True)
-
-    stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    # Every post carries all three keys by now, so a C-level itemgetter is enough
+    rank_key = itemgetter("keyword_hit_count", "score", "num_comments")
+    if sort_output:
+        enriched.sort(key=rank_key, reverse=True)
+        top = enriched[:10]
+    else:
+        # Only the summary needs ranking: O(N log k) instead of a full sort
+        top = heapq.nlargest(10, enriched, key=rank_key)
+
+    stamp = time.strftime("%Y%m%d_%H%M%S")
     out_json = OUT / f"posts_{stamp}.json"
     out_csv  = OUT / f"posts_{stamp}.csv"
     out_summary = OUT / f"summary_{stamp}.txt"
 
     # Write JSON
-    with open(out_json, "w", encoding="utf-8-sig") as f:
-        json.dump(enriched, f, ensure_ascii=False, indent=2)
+    write_json(out_json, enriched, bom=True)
 
     # Write CSV
     fieldnames = ["subreddit","id","created_utc","score","num_comments","title","permalink","keyword_hit_count","keyword_hits"]
-    with open(out_csv, "w", encoding="utf-8-sig", newline="") as f:
-        w = csv.DictWriter(f, fieldnames=fieldnames)
-        w.writeheader()
-        for p in enriched:
-            row = {k: p.get(k, "") for k in fieldnames}
-            row["keyword_hits"] = ";".join(p.get("keyword_hits") or [])
-            w.writerow(row)
+    with open(out_csv, "w", encoding="utf-8-sig", newline="", buffering=1 << 20) as f:
+        # Fixed schema, so format rows directly instead of going through the csv module
+        f.write(",".join(fieldnames) + "\r\n")
+        f.write("".join(
+            f'{csv_field(p.get("subreddit"))},{csv_field(p.get("id"))},{csv_field(p.get("created_utc"))},'
+            f'{csv_field(p.get("score"))},{csv_field(p.get("num_comments"))},{csv_field(p.get("title"))},'
+            f'{csv_field(p.get("permalink"))},{p["keyword_hit_count"]},'
+            f'{csv_field(";".join(p["keyword_hits"]))}\r\n'
+            for p in enriched
+        ))
 
     # Write summary
-    top = enriched[:10]
     lines = []
     lines.append(f"Window: last {hours} hours")
     lines.append(f"Total posts analyzed: {len(posts)}")
@@ -109,13 +107,13 @@ def main():
     lines.append("")
     lines.append("Top demand signals (sorted by keyword hits, score, comments):")
     for p in top:
-        dt = datetime.datetime.fromtimestamp(int(p["created_utc"]))
-        lines.append(f'- [{p.get("subreddit")}] ({p.get("keyword_hit_count")} hits) score={p.get("score")} comments={p.get("num_comments")} {dt:%Y-%m-%d %H:%M}: {p.get("title")}')
+        dt = time.strftime("%Y-%m-%d %H:%M", time.localtime(int(p["created_utc"])))
+        lines.append(f'- [{p.get("subreddit")}] ({p.get("keyword_hit_count")} hits) score={p.get("score")} comments={p.get("num_comments")} {dt}: {p.get("title")}')
         if p.get("keyword_hits"):
             lines.append(f'  hits: {", ".join(p["keyword_hits"])}')
         if p.get("permalink"):
             lines.append(f'  link: {p["permalink"]}')
-    with open(out_summary, "w", encoding="utf-8-sig") as f:
+    with open(out_summary, "w", encoding="utf-8-sig", buffering=1 << 20) as f:
         f.write("\n".join(lines) + "\n")
 
     log(f"Wrote: {out_json.name}, {out_csv.name}, {out_summary.name}")
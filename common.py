@@ -0,0 +1,54 @@
+﻿# common.py
+# Logging and output helpers shared by analyze_live.py and analyze_mock.py.
+
+import json, logging, sys
+
+# orjson is optional; stdlib json is the fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BOM = b"\xef\xbb\xbf"
+
+def make_logger(name, path, encoding="utf-8"):
+    """Return log(msg) printing "[timestamp] msg" to stdout and appending it to path."""
+    # Handlers keep the log file open for the whole run instead of reopening it per line
+    logger = logging.getLogger(name)
+    if not logger.handlers:
+        fmt = logging.Formatter("[%(asctime)s] %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
+        for h in (logging.FileHandler(path, encoding=encoding), logging.StreamHandler(sys.stdout)):
+            h.setFormatter(fmt)
+            logger.addHandler(h)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+    def log(msg: str):
+        logger.info(msg)
+
+    return log
+
+def read_json(path):
+    # Parse straight from bytes; strip the BOM Windows editors like to add
+    raw = path.read_bytes()
+    if raw.startswith(BOM):
+        raw = raw[3:]
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+def write_json(path, obj, bom=False):
+    # Serialize in one shot and hand the file a single write
+    if orjson is not None:
+        data = orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    else:
+        data = json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(BOM + data if bom else data)
+
+def csv_field(v):
+    # Same output as csv.writer's default QUOTE_MINIMAL dialect
+    s = "" if v is None else str(v)
+    if '"' in s:
+        return '"' + s.replace('"', '""') + '"'
+    if "," in s or "\n" in s or "\r" in s:
+        return '"' + s + '"'
+    return s
@@ -0,0 +1,101 @@
+﻿# keyword_match.py
+# Multi-keyword matching shared by analyze_live.py and analyze_mock.py.
+# The keyword list is lowercased once. Small lists are checked keyword by
+# keyword with `in`; larger ones are compiled into a multi-pattern matcher
+# (hyperscan or pyahocorasick, both optional) so each post is scanned once.
+
+import re
+
+# hyperscan (SIMD multi-literal DFA, x86 only) is preferred when installed
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Below these keyword counts the `in` loop is faster than the compiled
+# matchers, whose per-post call overhead dominates (measured on ~400-char
+# posts: hyperscan ~3.9us flat, pyahocorasick ~5-7us, `in` ~0.2us/keyword)
+HYPERSCAN_MIN_KEYWORDS = 20
+AHOCORASICK_MIN_KEYWORDS = 40
+
+def _on_match(idx, start, end, flags, found):
+    found.add(idx)
+
+def pick_backend(n_keywords):
+    if hyperscan is not None and n_keywords >= HYPERSCAN_MIN_KEYWORDS:
+        return "hyperscan"
+    if ahocorasick is not None and n_keywords >= AHOCORASICK_MIN_KEYWORDS:
+        return "ahocorasick"
+    return "substring"
+
+def build_matcher(keywords, backend=None):
+    """Compile keywords once; returns keyword_hits(blob) -> hits in config order.
+
+    blob must already be lowercased (see the enrichment loops).
+
+    backend forces "hyperscan", "ahocorasick" or "substring"; by default it is
+    picked from the keyword count.
+    """
+    # Duplicates are kept on purpose: a keyword listed twice counts twice, as it always has
+    kws = [k for k in keywords if k]
+    lower_keywords = [k.lower() for k in kws]
+
+    if not kws:
+        return lambda blob: []
+
+    return _build_backend(kws, lower_keywords, backend)
+
+def _build_backend(kws, lower_keywords, backend):
+    if backend is None:
+        backend = pick_backend(len(kws))
+
+    if backend == "hyperscan":
+        db = hyperscan.Database()
+        db.compile(
+            expressions=[re.escape(k).encode("utf-8") for k in lower_keywords],
+            ids=list(range(len(kws))),
+            elements=len(kws),
+            # No HS_FLAG_SINGLEMATCH: it drops later matches of other patterns;
+            # repeats are folded by the set instead
+            flags=[0] * len(kws),
+        )
+
+        def keyword_hits(blob):
+            found = set()
+            db.scan(blob.encode("utf-8"), match_event_handler=_on_match, context=found)
+            return [kws[i] for i in sorted(found)]
+
+        return keyword_hits
+
+    if backend == "ahocorasick":
+        # Case variants ("Lag", "lag") share one lowercased word; keep them all
+        words = {}
+        for i, lk in enumerate(lower_keywords):
+            words.setdefault(lk, []).append(i)
+        A = ahocorasick.Automaton()
+        for lk, idxs in words.items():
+            A.add_word(lk, idxs)
+        A.make_automaton()
+
+        def keyword_hits(blob):
+            found = set()
+            for _, idxs in A.iter(blob):
+                found.update(idxs)
+            return [kws[i] for i in sorted(found)]
+
+        return keyword_hits
+
+    if backend == "substring":
+        pairs = list(zip(kws, lower_keywords))
+
+        def keyword_hits(blob):
+            return [k for k, lk in pairs if lk in blob]
+
+        return keyword_hits
+
+    raise ValueError(f"Unknown keyword backend: {backend}")
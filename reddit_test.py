@@ -1,14 +1,13 @@
 ﻿# reddit_test.py
-# Fill in your Reddit API credentials and run:
+# Quick credential check using the same client as analyze_live.py.
+# Fill in REDDIT_CLIENT_ID / REDDIT_CLIENT_SECRET / REDDIT_USER_AGENT in .env and run:
 #   python reddit_test.py
 
-import praw
+from analyze_live import make_reddit
 
-reddit = praw.Reddit(
-    client_id="PASTE_CLIENT_ID_HERE",
-    client_secret="PASTE_CLIENT_SECRET_HERE",
-    user_agent="reddit-research-tools by u/YOUR_REDDIT_USERNAME"
-)
+reddit = make_reddit()
+if reddit is None:
+    raise SystemExit("OFFLINE_MODE is enabled; unset it to test the API.")
 
 sub = reddit.subreddit("mechanicadvice")
 
@@ -0,0 +1,57 @@
+﻿# common.csv_field must stay byte-identical to csv.writer, and the JSON
+# helpers must round-trip with and without a BOM.
+
+import csv
+import io
+import json
+import random
+
+import pytest
+
+import common
+
+def writer_line(row):
+    buf = io.StringIO()
+    csv.writer(buf).writerow(row)
+    return buf.getvalue()
+
+def field_line(row):
+    return ",".join(common.csv_field(v) for v in row) + "\r\n"
+
+@pytest.mark.parametrize("row", [
+    ["plain", "with,comma", 'say "hi"', '"', ",", ""],
+    ["cr\rhere", "lf\nhere", "crlf\r\nhere", " lead", "trail "],
+    [None, 0, -7, 3.5, 1e20, "a;b;c"],
+    ["ünïcode, ok", "tab\there", "semi;colon"],
+])
+def test_csv_field_matches_csv_writer(row):
+    assert field_line(row) == writer_line(row)
+
+def test_csv_field_matches_csv_writer_random():
+    rng = random.Random(3)
+    for _ in range(5000):
+        row = [rng.choice([
+            None,
+            rng.randint(-1000, 1000),
+            rng.random() * 100,
+            "".join(rng.choice('ab ,"\r\n;\tä') for _ in range(rng.randint(0, 8))),
+        ]) for _ in range(rng.randint(2, 6))]
+        assert field_line(row) == writer_line(row), row
+
+POSTS = [{"id": "abc", "title": "Ünïcode \"quoted\", title", "score": 3, "hits": ["lag", "fps"], "x": None}]
+
+@pytest.mark.parametrize("bom", [False, True])
+def test_json_round_trip(tmp_path, bom):
+    path = tmp_path / "posts.json"
+    common.write_json(path, POSTS, bom=bom)
+    raw = path.read_bytes()
+    assert raw.startswith(common.BOM) == bom
+    assert common.read_json(path) == POSTS
+    # Same bytes json.dump(ensure_ascii=False, indent=2) produced before
+    expected = json.dumps(POSTS, ensure_ascii=False, indent=2).encode("utf-8")
+    assert raw == (common.BOM + expected if bom else expected)
+
+def test_read_json_strips_bom(tmp_path):
+    path = tmp_path / "mock.json"
+    path.write_bytes(common.BOM + b'[{"a": 1}]')
+    assert common.read_json(path) == [{"a": 1}]
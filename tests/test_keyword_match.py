@@ -0,0 +1,51 @@
+﻿# Every keyword_match backend must agree with plain substring matching,
+# including case variants, overlapping keywords and non-ASCII text.
+
+import random
+
+import pytest
+
+import keyword_match
+
+BACKENDS = [
+    pytest.param("hyperscan", marks=pytest.mark.skipif(keyword_match.hyperscan is None, reason="hyperscan not installed")),
+    pytest.param("ahocorasick", marks=pytest.mark.skipif(keyword_match.ahocorasick is None, reason="pyahocorasick not installed")),
+    "substring",
+]
+
+def reference_hits(blob, keywords):
+    return [k for k in keywords if k and k.lower() in blob]
+
+def random_cases(seed, n=3000):
+    rng = random.Random(seed)
+    for _ in range(n):
+        keywords = ["".join(rng.choice("abAB' ä") for _ in range(rng.randint(1, 4)))
+                    for _ in range(rng.randint(0, 8))]
+        keywords += ["Won't Start", "won't start", ""]
+        text = "".join(rng.choice("abAB' ,äÄ") for _ in range(rng.randint(0, 30)))
+        yield keywords, text.lower() + rng.choice(["", " won't START"]).lower()
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_backend_matches_reference(backend):
+    for keywords, blob in random_cases(seed=1):
+        keyword_hits = keyword_match.build_matcher(keywords, backend=backend)
+        assert keyword_hits(blob) == reference_hits(blob, keywords), (keywords, blob)
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_case_variants_all_reported(backend):
+    keyword_hits = keyword_match.build_matcher(["Lag", "lag", "LAG"], backend=backend)
+    assert keyword_hits("a lag b") == ["Lag", "lag", "LAG"]
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_late_match_after_repeated_hits(backend):
+    # hyperscan with HS_FLAG_SINGLEMATCH stopped reporting here before "ä"
+    keyword_hits = keyword_match.build_matcher(["abd", "b", "won't start", "ä"], backend=backend)
+    assert keyword_hits("dca abd babbbda  b bb dadcbä") == ["abd", "b", "ä"]
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_duplicate_keywords_counted_twice(backend):
+    keyword_hits = keyword_match.build_matcher(["lag", "fps", "lag"], backend=backend)
+    assert keyword_hits("input lag at 30 fps") == ["lag", "fps", "lag"]
+
+def test_no_keywords():
+    assert keyword_match.build_matcher([None, ""])("anything") == []